@@ -6,7 +6,7 @@ testing framework.
 
 import importlib
 from abc import ABC, abstractmethod
-from typing import Any, List, Tuple
+from typing import Any, Iterator, List, Tuple
 
 from ethereum import rlp
 from ethereum.base_types import U64, U256, Bytes0
@@ -232,25 +232,42 @@ class Load(BaseLoad):
 
     def json_to_state(self, raw: Any) -> Any:
         """Converts json state data to a state object"""
-        state = self.State()
-        set_storage = self._module("state").set_storage
+        return self.accounts_to_state(self.json_to_accounts(raw))
+
+    def json_to_accounts(self, raw: Any) -> Tuple[Any, ...]:
+        """
+        Converts json state data to a tuple of `(address, account, storage)`
+        entries. Unlike a state object, the result is never mutated and can
+        be shared between several states.
+        """
+        accounts = []
 
         for (address_hex, account_state) in raw.items():
-            address = self.hex_to_address(address_hex)
             account = self.Account(
                 nonce=hex_to_uint(account_state.get("nonce", "0x0")),
                 balance=U256(hex_to_uint(account_state.get("balance", "0x0"))),
                 code=hex_to_bytes(account_state.get("code", "")),
             )
+            storage = tuple(
+                (hex_to_bytes32(k), U256.from_be_bytes(hex_to_bytes32(v)))
+                for (k, v) in account_state.get("storage", {}).items()
+            )
+            accounts.append(
+                (self.hex_to_address(address_hex), account, storage)
+            )
+
+        return tuple(accounts)
+
+    def accounts_to_state(self, accounts: Tuple[Any, ...]) -> Any:
+        """Builds a new state object from `json_to_accounts` entries"""
+        state = self.State()
+        set_storage = self._module("state").set_storage
+
+        for (address, account, storage) in accounts:
             self.set_account(state, address, account)
 
-            for (k, v) in account_state.get("storage", {}).items():
-                set_storage(
-                    state,
-                    address,
-                    hex_to_bytes32(k),
-                    U256.from_be_bytes(hex_to_bytes32(v)),
-                )
+            for (k, v) in storage:
+                set_storage(state, address, k, v)
         return state
 
     def json_to_access_list(self, raw: Any) -> Any:
@@ -322,19 +339,48 @@ class Load(BaseLoad):
         self,
         json_blocks: Any,
     ) -> Tuple[List[Any], List[Hash32], List[bytes]]:
-        """Converts json block data to a block object"""
+        """
+        Converts json block data to lists of blocks, header hashes and block
+        rlps. A header hash is the fixture's `blockHeader.hash` when the block
+        has one, and is computed from the decoded header otherwise
+        """
         blocks = []
         block_header_hashes = []
         block_rlps = []
 
+        for block, block_header_hash, block_rlp in self.iter_json_to_blocks(
+            json_blocks
+        ):
+            blocks.append(block)
+            block_header_hashes.append(block_header_hash)
+            block_rlps.append(block_rlp)
+
+        return blocks, block_header_hashes, block_rlps
+
+    def iter_json_to_blocks(
+        self,
+        json_blocks: Any,
+    ) -> Iterator[Tuple[Any, Hash32, bytes]]:
+        """
+        Converts json block data to `(block, header_hash, block_rlp)` triples,
+        decoding one block at a time. The header hash is the fixture's
+        `blockHeader.hash` when the block has one, and is computed from the
+        decoded header otherwise. It is not checked against the block here
+        """
         for json_block in json_blocks:
             if "rlp" in json_block:
                 # Always decode from rlp
                 block_rlp = hex_to_bytes(json_block["rlp"])
                 block = rlp.decode_to(self.Block, block_rlp)
-                blocks.append(block)
-                block_header_hashes.append(rlp.rlp_hash(block.header))
-                block_rlps.append(block_rlp)
+                if "blockHeader" in json_block:
+                    # Report the fixture's hash so that it can be checked
+                    # against the decoded header.
+                    block_header_hash = Hash32(
+                        hex_to_bytes(json_block["blockHeader"]["hash"])
+                    )
+                else:
+                    block_header_hash = rlp.rlp_hash(block.header)
+                yield block, block_header_hash, block_rlp
                 continue
 
             header = self.json_to_header(json_block["blockHeader"])
@@ -361,12 +407,11 @@ class Load(BaseLoad):
 
             block = self.Block(*parameters)
 
-            block_header_hashes.append(
-                Hash32(hex_to_bytes(json_block["blockHeader"]["hash"]))
+            yield (
+                block,
+                Hash32(hex_to_bytes(json_block["blockHeader"]["hash"])),
+                hex_to_bytes(json_block["rlp"]),
             )
-            block_rlps.append(hex_to_bytes(json_block["rlp"]))
-
-        return blocks, block_header_hashes, block_rlps
 
     def json_to_header(self, raw: Any) -> Any:
         """Converts json header data to a header object"""
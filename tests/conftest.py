@@ -3,8 +3,10 @@ import shutil
 import tarfile
 import tempfile
 import urllib.request
+from typing import Iterator
 
 import git
+import pytest
 from _pytest.config import Config
 from _pytest.config.argparsing import Parser
 from filelock import SoftFileLock
@@ -12,6 +14,7 @@ from pytest import Session
 
 import ethereum
 from ethereum_spec_tools.evm_trace import evm_trace
+from tests.helpers import load_state_tests
 
 # Update the links and commit has in order to consume
 # newer/other tests
@@ -50,6 +53,14 @@ def pytest_addoption(parser: Parser) -> None:
         const=True,
         help="Use optimized state and ethash",
     )
+    parser.addoption(
+        "--full-rlp-assert",
+        dest="full_rlp_assert",
+        default=False,
+        action="store_const",
+        const=True,
+        help="Check that every test block re-encodes to its fixture RLP",
+    )
 
 
 def pytest_configure(config: Config) -> None:
@@ -64,6 +75,8 @@ def pytest_configure(config: Config) -> None:
         import ethereum_optimized
 
         ethereum_optimized.monkey_patch(None)
+    if config.getoption("full_rlp_assert"):
+        load_state_tests.FULL_RLP_ASSERT = True
 
 
 def download_fixtures(url: str, location: str) -> None:
@@ -118,3 +131,13 @@ def pytest_sessionstart(session: Session) -> None:
             )
         else:
             download_fixtures(props["url"], fixture_path)
+
+
+@pytest.fixture(autouse=True, scope="module")
+def clear_json_fixture_cache() -> Iterator[None]:
+    """
+    Drop the parsed json fixtures cached by one test module before moving on
+    to the next.
+    """
+    yield
+    load_state_tests._load_json.cache_clear()
@@ -1,18 +1,42 @@
+import hashlib
 import json
 import os.path
 import re
-from glob import glob
-from typing import Any, Dict, Generator, Tuple, Union, cast
-from unittest.mock import call, patch
-
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, closing
+from dataclasses import fields
+from functools import lru_cache
+from itertools import repeat
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    Union,
+    cast,
+)
+from unittest.mock import patch
+
+import ijson
 import pytest
 from _pytest.mark.structures import ParameterSet
 
 from ethereum import rlp
-from ethereum.base_types import U64
+from ethereum.base_types import U64, Bytes
 from ethereum.utils.hexadecimal import hex_to_bytes
 from ethereum_spec_tools.evm_tools.fixture_loader import Load
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    # orjson is not available on PyPy.
+    from json import loads as json_loads  # type: ignore
+
 
 class NoTestsFound(Exception):
     """
@@ -27,25 +51,102 @@ class NoPostState(Exception):
     """
 
 
+# Re-encode every block and compare it with the fixture RLP. Off by default,
+# enabled with `--full-rlp-assert`.
+FULL_RLP_ASSERT = False
+
+# Fixtures larger than this are streamed with ijson rather than being
+# parsed into memory in one go.
+STREAMING_THRESHOLD = 1024 * 1024
+
+
+@lru_cache(maxsize=32)
+def _load_json(test_file: str) -> Dict[str, Any]:
+    """
+    Parse a (small) json fixture. The result is cached so that a file is not
+    parsed again for every test case it contains.
+    """
+    with open(test_file, "rb") as fp:
+        return json_loads(fp.read())
+
+
+def iter_json_fixture(
+    test_file: str,
+) -> Generator[Tuple[str, Any], None, None]:
+    """
+    Yield the top level `(key, value)` pairs of a json fixture, only holding
+    one value in memory at a time for large files.
+    """
+    if os.path.getsize(test_file) < STREAMING_THRESHOLD:
+        yield from _load_json(test_file).items()
+    else:
+        with open(test_file, "rb") as fp:
+            yield from ijson.kvitems(fp, "", use_float=True)
+
+
+# Decoded accounts of recently seen pre/post states, keyed by fork and a
+# digest of the json allocation. Many fixtures share the same allocations.
+_ACCOUNTS_CACHE: "OrderedDict[Tuple[str, bytes], Tuple[Any, ...]]" = (
+    OrderedDict()
+)
+_ACCOUNTS_CACHE_SIZE = 64
+
+
+def json_to_state(raw: Any, load: Load) -> Any:
+    """
+    Build a fresh state object from json, reusing the decoded accounts of an
+    identical allocation seen in an earlier test case.
+    """
+    digest = hashlib.blake2b(json.dumps(raw, sort_keys=True).encode()).digest()
+    key = (load.fork_module, digest)
+
+    try:
+        accounts = _ACCOUNTS_CACHE[key]
+        _ACCOUNTS_CACHE.move_to_end(key)
+    except KeyError:
+        accounts = load.json_to_accounts(raw)
+        _ACCOUNTS_CACHE[key] = accounts
+        if len(_ACCOUNTS_CACHE) > _ACCOUNTS_CACHE_SIZE:
+            _ACCOUNTS_CACHE.popitem(last=False)
+
+    return load.accounts_to_state(accounts)
+
+
+@lru_cache(maxsize=None)
+def _genesis_block_ctor(load: Load) -> Callable[[Any], Any]:
+    # The genesis block has no transactions, ommers or (from Shanghai)
+    # withdrawals: every field but the header is an empty tuple.
+    block = load.Block
+    empty_fields = ((),) * (len(fields(block)) - 1)
+    return lambda header: block(header, *empty_fields)
+
+
 def load_test(test_case: Dict, load: Load) -> Dict:
 
     test_file = test_case["test_file"]
     test_key = test_case["test_key"]
 
-    with open(test_file, "r") as fp:
-        data = json.load(fp)
-
-    json_data = data[test_key]
-
-    blocks, block_header_hashes, block_rlps = load.json_to_blocks(
-        json_data["blocks"]
-    )
+    if os.path.getsize(test_file) < STREAMING_THRESHOLD:
+        json_data = _load_json(test_file)[test_key]
+    else:
+        # Close the file as soon as the test is found rather than leaving it
+        # to the garbage collector, which is not immediate on PyPy.
+        with closing(iter_json_fixture(test_file)) as test_cases:
+            for key, json_data in test_cases:
+                if key == test_key:
+                    break
+            else:
+                raise KeyError(test_key)
 
     try:
         raw_post_state = json_data["postState"]
     except KeyError:
+        # Blocks are otherwise decoded lazily; decode them here so that an
+        # undecodable block still fails as `InvalidBlock`.
+        for _ in load.iter_json_to_blocks(json_data["blocks"]):
+            pass
         raise NoPostState
-    post_state = load.json_to_state(raw_post_state)
+    post_state = json_to_state(raw_post_state, load)
 
     return {
         "test_file": test_case["test_file"],
@@ -57,11 +158,10 @@ def load_test(test_case: Dict, load: Load) -> Dict:
         ),
         "genesis_block_rlp": hex_to_bytes(json_data["genesisRLP"]),
         "last_block_hash": hex_to_bytes(json_data["lastblockhash"]),
-        "pre_state": load.json_to_state(json_data["pre"]),
+        "pre_state": json_to_state(json_data["pre"], load),
         "expected_post_state": post_state,
-        "blocks": blocks,
-        "block_header_hashes": block_header_hashes,
-        "block_rlps": block_rlps,
+        # Blocks are decoded lazily, one at a time, by `add_blocks_to_chain`
+        "blocks": load.iter_json_to_blocks(json_data["blocks"]),
         "ignore_pow_validation": json_data["sealEngine"] == "NoProof",
     }
 
@@ -70,91 +170,152 @@ def run_blockchain_st_test(test_case: Dict, load: Load) -> None:
 
     test_data = load_test(test_case, load)
 
-    genesis_header = test_data["genesis_header"]
-    parameters = [
-        genesis_header,
-        (),
-        (),
-    ]
-    if hasattr(genesis_header, "withdrawals_root"):
-        parameters.append(())
-
-    genesis_block = load.Block(*parameters)
-
-    assert rlp.rlp_hash(genesis_header) == test_data["genesis_header_hash"]
-    # FIXME: Re-enable this assertion once the genesis block RLP is
-    # correctly encoded for Shanghai.
-    # See https://github.com/ethereum/execution-spec-tests/issues/64
-    # assert (
-    #     rlp.encode(cast(rlp.RLP, genesis_block))
-    #     == test_data["genesis_block_rlp"]
-    # )
-
-    chain = load.BlockChain(
-        blocks=[genesis_block],
-        state=test_data["pre_state"],
-        chain_id=test_data["chain_id"],
-    )
-
-    if not test_data["ignore_pow_validation"] or load.proof_of_stake:
-        add_blocks_to_chain(chain, test_data, load)
-    else:
-        with patch(
-            f"ethereum.{load.fork_module}.fork.validate_proof_of_work",
-            autospec=True,
-        ) as mocked_pow_validator:
-            add_blocks_to_chain(chain, test_data, load)
-            mocked_pow_validator.assert_has_calls(
-                [call(block.header) for block in test_data["blocks"]],
-                any_order=False,
+    with ExitStack() as stack:
+        # Free both states and drop the test data even when an assertion
+        # fails, since pytest keeps the frames of failed tests alive.
+        stack.callback(test_data.clear)
+        stack.callback(load.close_state, test_data["expected_post_state"])
+        stack.callback(load.close_state, test_data["pre_state"])
+
+        genesis_header = test_data["genesis_header"]
+        genesis_block = _genesis_block_ctor(load)(genesis_header)
+
+        assert rlp.rlp_hash(genesis_header) == test_data["genesis_header_hash"]
+        # FIXME: Re-enable this assertion once the genesis block RLP is
+        # correctly encoded for Shanghai.
+        # See https://github.com/ethereum/execution-spec-tests/issues/64
+        # assert (
+        #     rlp.encode(cast(rlp.RLP, genesis_block))
+        #     == test_data["genesis_block_rlp"]
+        # )
+
+        chain = load.BlockChain(
+            blocks=[genesis_block],
+            state=test_data["pre_state"],
+            chain_id=test_data["chain_id"],
+        )
+
+        if not test_data["ignore_pow_validation"] or load.proof_of_stake:
+            _, last_block_hash = add_blocks_to_chain(chain, test_data, load)
+        else:
+            # Record the validated headers with a plain list rather than an
+            # autospecced mock, which is expensive to build for every test.
+            pow_headers: List[Any] = []
+            with patch(
+                f"ethereum.{load.fork_module}.fork.validate_proof_of_work",
+                pow_headers.append,
+            ):
+                headers, last_block_hash = add_blocks_to_chain(
+                    chain, test_data, load
+                )
+            # Like `Mock.assert_has_calls`: the block headers must have been
+            # validated consecutively, possibly followed or preceded by
+            # ommers.
+            assert any(
+                pow_headers[i : i + len(headers)] == headers
+                for i in range(len(pow_headers) - len(headers) + 1)
             )
 
-    assert (
-        rlp.rlp_hash(chain.blocks[-1].header) == test_data["last_block_hash"]
-    )
-    assert chain.state == test_data["expected_post_state"]
-    load.close_state(chain.state)
-    load.close_state(test_data["expected_post_state"])
+        assert last_block_hash == test_data["last_block_hash"]
+        assert chain.state == test_data["expected_post_state"]
 
 
 def add_blocks_to_chain(
     chain: Any, test_data: Dict[str, Any], load: Load
-) -> None:
-    for idx, block in enumerate(test_data["blocks"]):
-        assert (
-            rlp.rlp_hash(block.header) == test_data["block_header_hashes"][idx]
-        )
-        assert rlp.encode(cast(rlp.RLP, block)) == test_data["block_rlps"][idx]
+) -> Tuple[List[Any], Bytes]:
+    """
+    Apply each block of the test to `chain` as soon as it is decoded. Returns
+    the headers of the applied blocks and the hash of the chain's head.
+    """
+    headers = []
+    head_hash = test_data["genesis_header_hash"]
+    for block, block_header_hash, block_rlp in test_data["blocks"]:
+        head_hash = rlp.rlp_hash(block.header)
+        assert head_hash == block_header_hash
+        if FULL_RLP_ASSERT:
+            assert rlp.encode(cast(rlp.RLP, block)) == block_rlp
         load.state_transition(chain, block)
+        headers.append(block.header)
+    return headers, head_hash
 
 
 # Functions that fetch individual test cases
 def load_json_fixture(test_file: str, network: str) -> Generator:
-    # Extract the pure basename of the file without the path to the file.
-    # Ex: Extract "world.json" from "path/to/file/world.json"
-    pure_test_file = os.path.basename(test_file)
-    # Extract the filename without the extension. Ex: Extract "world" from
-    # "world.json"
-    with open(test_file, "r") as fp:
-        data = json.load(fp)
-
-        # Search tests by looking at the `network` attribute
-        found_keys = []
-        for key, test in data.items():
-            if "network" not in test:
-                continue
+    # Extract the name of the folder containing the file, used to identify
+    # tests in the output. Ex: Extract "file" from "path/to/file/world.json"
+    folder_name = os.path.basename(os.path.dirname(test_file))
+    # Search tests by looking at the `network` attribute
+    found_keys = [
+        key
+        for key, test in iter_json_fixture(test_file)
+        if test.get("network") == network
+    ]
+
+    if not any(found_keys):
+        raise NoTestsFound
+
+    for _key in found_keys:
+        yield {
+            "test_file": test_file,
+            "test_key": _key,
+            "_id": f"{folder_name} - {_key}",
+        }
+
+
+def scan_file(test_file: str, network: str) -> List[Dict]:
+    """
+    List the test cases for `network` in a single fixture file.
+    """
+    try:
+        return list(load_json_fixture(test_file, network))
+    except NoTestsFound:
+        # file doesn't contain tests for the given fork
+        return []
+
+
+def collection_workers() -> int:
+    """
+    Number of processes to parse fixtures with during collection. Inside a
+    pytest-xdist worker the CPUs are already in use, and forking a process
+    that runs execnet threads can deadlock, so fixtures are parsed in-process.
+    """
+    if "PYTEST_XDIST_WORKER" in os.environ:
+        return 1
+    return os.cpu_count() or 1
+
 
-            if test["network"] == network:
-                found_keys.append(key)
+def compile_any(patterns: Tuple[str, ...]) -> "re.Pattern[str]":
+    """
+    Compile a single regular expression matching any of `patterns`. An empty
+    tuple yields an expression that never matches.
+    """
+    if not patterns:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(f"(?:{x})" for x in patterns))
 
-        if not any(found_keys):
-            raise NoTestsFound
 
-        for _key in found_keys:
-            yield {
-                "test_file": test_file,
-                "test_key": _key,
-            }
+def iter_json_files(path: str, ignore_re: "re.Pattern[str]") -> Iterator[str]:
+    """
+    Recursively yield the json files under `path` in sorted order. Files and
+    directories matched by `ignore_re` are skipped without being scanned.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if not ignore_re.search(entry.path + "/"):
+                yield from iter_json_files(entry.path, ignore_re)
+        elif (
+            entry.name.endswith(".json")
+            and not entry.name.startswith(".")
+            and entry.is_file()
+            and not ignore_re.search(entry.path)
+        ):
+            yield entry.path
 
 
 def fetch_state_test_files(
@@ -166,60 +327,63 @@ def fetch_state_test_files(
     ignore_list: Tuple[str, ...] = (),
 ) -> Generator[Union[Dict, ParameterSet], None, None]:
 
-    all_slow = [re.compile(x) for x in slow_list]
-    all_big_memory = [re.compile(x) for x in big_memory_list]
-    all_ignore = [re.compile(x) for x in ignore_list]
+    slow_re = compile_any(slow_list)
+    big_memory_re = compile_any(big_memory_list)
+    ignore_re = compile_any(ignore_list)
 
     # Get all the files to iterate over
     # Maybe from the custom file list or entire test_dir
-    files_to_iterate = []
+    files_to_iterate: Iterable[str]
     if len(only_in):
         # Get file list from custom list, if one is specified
-        files_to_iterate.extend(
-            os.path.join(test_dir, test_path) for test_path in only_in
-        )
+        files_to_iterate = [
+            full_path
+            for full_path in (os.path.join(test_dir, x) for x in only_in)
+            if not ignore_re.search(full_path)
+        ]
     else:
         # If there isnt a custom list, iterate over the test_dir
-        all_jsons = [
-            y
-            for x in os.walk(test_dir)
-            for y in glob(os.path.join(x[0], "*.json"))
-        ]
+        files_to_iterate = iter_json_files(test_dir, ignore_re)
+
+    # Parse the files in parallel. `map` keeps the results in file order so
+    # that every xdist worker collects the tests in the same order.
+    all_test_files = list(files_to_iterate)
+    max_workers = min(collection_workers(), len(all_test_files))
+    all_test_cases: Iterable[List[Dict]]
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            all_test_cases = list(
+                executor.map(
+                    scan_file,
+                    all_test_files,
+                    repeat(network),
+                    chunksize=max(1, len(all_test_files) // (4 * max_workers)),
+                )
+            )
+    else:
+        all_test_cases = map(scan_file, all_test_files, repeat(network))
 
-        files_to_iterate.extend(
-            full_path
-            for full_path in all_jsons
-            if not any(x.search(full_path) for x in all_ignore)
-        )
     # Start yielding individual test cases from the file list
-    for _test_file in files_to_iterate:
-        try:
-            for _test_case in load_json_fixture(_test_file, network):
-                # _identifier could identifiy files, folders through test_file
-                #  individual cases through test_key
-                _identifier = (
-                    "("
-                    + _test_case["test_file"]
-                    + "|"
-                    + _test_case["test_key"]
-                    + ")"
-                )
-                if any(x.search(_identifier) for x in all_ignore):
-                    continue
-                elif any(x.search(_identifier) for x in all_slow):
-                    yield pytest.param(_test_case, marks=pytest.mark.slow)
-                elif any(x.search(_identifier) for x in all_big_memory):
-                    yield pytest.param(_test_case, marks=pytest.mark.bigmem)
-                else:
-                    yield _test_case
-        except NoTestsFound:
-            # file doesn't contain tests for the given fork
-            continue
+    for test_cases in all_test_cases:
+        for _test_case in test_cases:
+            # _identifier could identifiy files, folders through test_file
+            #  individual cases through test_key. Ignored files have already
+            #  been skipped, but an ignore entry may still name a test_key.
+            _identifier = (
+                f"({_test_case['test_file']}|{_test_case['test_key']})"
+            )
+            if ignore_re.search(_identifier):
+                continue
+            elif slow_re.search(_identifier):
+                yield pytest.param(_test_case, marks=pytest.mark.slow)
+            elif big_memory_re.search(_identifier):
+                yield pytest.param(_test_case, marks=pytest.mark.bigmem)
+            else:
+                yield _test_case
 
 
 # Test case Identifier
 def idfn(test_case: Dict) -> str:
     if isinstance(test_case, dict):
-        folder_name = test_case["test_file"].split("/")[-2]
-        # Assign Folder name and test_key to identify tests in output
-        return f"{folder_name} - " + test_case["test_key"]
+        # Folder name and test_key, assigned by `load_json_fixture`
+        return test_case["_id"]
@@ -1,83 +1,45 @@
-import json
-from typing import Any
+from typing import Any, Iterator, Tuple
+
+import pytest
 
 from ethereum.tangerine_whistle.fork_types import Bytes
 from ethereum.tangerine_whistle.trie import Trie, root, trie_set
-from ethereum.utils.hexadecimal import (
-    has_hex_prefix,
-    hex_to_bytes,
-    remove_hex_prefix,
-)
+from ethereum.utils.hexadecimal import remove_hex_prefix
+from tests.helpers.load_state_tests import iter_json_fixture
 
 
 def to_bytes(data: str) -> Bytes:
     if data is None:
         return b""
-    return hex_to_bytes(data) if has_hex_prefix(data) else data.encode()
-
-
-def test_trie_secure_hex() -> None:
-    tests = load_tests("hex_encoded_securetrie_test.json")
-
-    for (name, test) in tests.items():
-        st: Trie[Bytes, Bytes] = Trie(secured=True, default=b"")
-        for (k, v) in test.get("in").items():
-            trie_set(st, to_bytes(k), to_bytes(v))
-        result = root(st)
-        expected = remove_hex_prefix(test.get("root"))
-        assert result.hex() == expected, f"test {name} failed"
-
-
-def test_trie_secure() -> None:
-    tests = load_tests("trietest_secureTrie.json")
-
-    for (name, test) in tests.items():
-        st: Trie[Bytes, Bytes] = Trie(secured=True, default=b"")
-        for t in test.get("in"):
-            trie_set(st, to_bytes(t[0]), to_bytes(t[1]))
-        result = root(st)
-        expected = remove_hex_prefix(test.get("root"))
-        assert result.hex() == expected, f"test {name} failed"
-
-
-def test_trie_secure_any_order() -> None:
-    tests = load_tests("trieanyorder_secureTrie.json")
-
-    for (name, test) in tests.items():
-        st: Trie[Bytes, Bytes] = Trie(secured=True, default=b"")
-        for (k, v) in test.get("in").items():
-            trie_set(st, to_bytes(k), to_bytes(v))
-        result = root(st)
-        expected = remove_hex_prefix(test.get("root"))
-        assert result.hex() == expected, f"test {name} failed"
-
-
-def test_trie() -> None:
-    tests = load_tests("trietest.json")
-
-    for (name, test) in tests.items():
-        st: Trie[Bytes, Bytes] = Trie(secured=False, default=b"")
-        for t in test.get("in"):
-            trie_set(st, to_bytes(t[0]), to_bytes(t[1]))
-        result = root(st)
-        expected = remove_hex_prefix(test.get("root"))
-        assert result.hex() == expected, f"test {name} failed"
-
-
-def test_trie_any_order() -> None:
-    tests = load_tests("trieanyorder.json")
-
-    for (name, test) in tests.items():
-        st: Trie[Bytes, Bytes] = Trie(secured=False, default=b"")
-        for (k, v) in test.get("in").items():
+    if data.startswith("0x"):
+        return bytes.fromhex(data[2:])
+    return data.encode()
+
+
+@pytest.mark.parametrize(
+    ("path", "secured", "dict_form"),
+    [
+        pytest.param(
+            "hex_encoded_securetrie_test.json", True, True, id="secure_hex"
+        ),
+        pytest.param("trietest_secureTrie.json", True, False, id="secure"),
+        pytest.param(
+            "trieanyorder_secureTrie.json", True, True, id="secure_any_order"
+        ),
+        pytest.param("trietest.json", False, False, id="trie"),
+        pytest.param("trieanyorder.json", False, True, id="any_order"),
+    ],
+)
+def test_trie(path: str, secured: bool, dict_form: bool) -> None:
+    for (name, test) in load_tests(path):
+        st: Trie[Bytes, Bytes] = Trie(secured=secured, default=b"")
+        items = test.get("in").items() if dict_form else test.get("in")
+        for (k, v) in items:
             trie_set(st, to_bytes(k), to_bytes(v))
         result = root(st)
         expected = remove_hex_prefix(test.get("root"))
         assert result.hex() == expected, f"test {name} failed"
 
 
-def load_tests(path: str) -> Any:
-    with open(f"tests/fixtures/TrieTests/{path}") as f:
-        tests = json.load(f)
-
-    return tests
+def load_tests(path: str) -> Iterator[Tuple[str, Any]]:
+    return iter_json_fixture(f"tests/fixtures/TrieTests/{path}")